@@ -1,21 +1,30 @@
 """CLI application for shardctl."""
 
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import typer
 from rich.console import Console
+from rich.text import Text
 
-from .compose import ComposeManager
-from .config import Config
+from . import utils
+from .config import BuildConfig, get_config
 from .utils import (
+    BUILD_STAMP_DIR,
     build_service,
     clone_services,
+    compute_build_stamp,
+    create_buffered_console,
     create_services_config_example,
     format_service_status,
+    path_exists,
     validate_environment,
 )
 
+if TYPE_CHECKING:
+    from .compose import ComposeManager
+
 app = typer.Typer(
     name="shardctl",
     help="A CLI tool for managing microservices with docker-compose",
@@ -24,8 +33,14 @@ app = typer.Typer(
 
 console = Console()
 
+# Color used for each container state in `status` output (anything else is yellow)
+STATE_STYLES = {
+    "running": "green",
+    "exited": "red",
+}
+
 
-def get_manager(profile: Optional[str] = None) -> ComposeManager:
+def get_manager(profile: Optional[str] = None) -> "ComposeManager":
     """Get a ComposeManager instance with the current configuration.
 
     Args:
@@ -34,7 +49,9 @@ def get_manager(profile: Optional[str] = None) -> ComposeManager:
     Returns:
         ComposeManager instance.
     """
-    config = Config()
+    from .compose import ComposeManager
+
+    config = get_config()
     return ComposeManager(config, profile=profile)
 
 
@@ -51,6 +68,17 @@ def clone(
         "--all",
         help="Clone all services including disabled ones (default: enabled only)"
     ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of repositories to clone in parallel (default: up to 8)"
+    ),
+    full_history: bool = typer.Option(
+        False,
+        "--full-history",
+        help="Clone full git history (default: shallow clone of the configured branch)"
+    ),
 ):
     """Clone service repositories with their configured branches.
 
@@ -66,8 +94,10 @@ def clone(
         shardctl clone --all        # Clone all services (including disabled)
         shardctl clone --force      # Remove and re-clone enabled services
         shardctl clone --all --force  # Remove and re-clone all services
+        shardctl clone --jobs 4     # Clone at most 4 repositories at a time
+        shardctl clone --full-history  # Clone with full git history
     """
-    config = Config()
+    config = get_config()
 
     # Get service repositories from config (filter by enabled unless --all is specified)
     service_repos = config.get_service_repos(only_enabled=not all_services)
@@ -93,7 +123,13 @@ def clone(
         console.print("[bold blue]Cloning all service repositories (including disabled)...[/bold blue]\n")
     else:
         console.print("[bold blue]Cloning enabled service repositories...[/bold blue]\n")
-    clone_services(service_repos, config.services_dir, force=force)
+    clone_services(
+        service_repos,
+        config.services_dir,
+        force=force,
+        jobs=jobs,
+        full_history=full_history
+    )
     console.print("\n[green]✓[/green] Clone completed")
 
 
@@ -234,43 +270,74 @@ def shell(
     manager.shell(service, shell_cmd=shell_cmd)
 
 
-@app.command()
-def status(
-    profile: Optional[str] = typer.Option(None, "--profile", "-p", help="Compose profile (dev/prod)"),
-):
-    """Display service status."""
-    if not validate_environment():
-        raise typer.Exit(1)
+def _print_status(manager: "ComposeManager") -> None:
+    """Print one status line per service container.
 
-    manager = get_manager(profile)
+    Args:
+        manager: ComposeManager to query.
+    """
     services = manager.get_status()
 
     if not services:
         console.print("[yellow]No running services found[/yellow]")
         return
 
-    for service_info in services:
-        formatted = format_service_status(service_info)
+    rows = [format_service_status(service_info) for service_info in services]
 
-        # Color code the state
-        state = formatted["State"]
-        if state == "running":
-            state_color = "green"
-        elif state == "exited":
-            state_color = "red"
-        else:
-            state_color = "yellow"
+    # Size columns to their widest value in a single pass over the rows
+    widths = {
+        column: max(len(row[column]) for row in rows)
+        for column in ("Name", "Service", "State", "Status")
+    }
+
+    for row in rows:
+        state = row["State"]
 
         # Simple line format: NAME SERVICE STATE STATUS PORTS
+        # Built as styled Text so no markup has to be parsed per row
         console.print(
-            f"{formatted['Name']:<30} "
-            f"{formatted['Service']:<20} "
-            f"[{state_color}]{state:<10}[/{state_color}] "
-            f"{formatted['Status']:<30} "
-            f"{formatted['Ports']}"
+            Text.assemble(
+                f"{row['Name']:<{widths['Name']}}  ",
+                f"{row['Service']:<{widths['Service']}}  ",
+                (f"{state:<{widths['State']}}", STATE_STYLES.get(state, "yellow")),
+                "  ",
+                f"{row['Status']:<{widths['Status']}}  ",
+                row["Ports"],
+            ),
+            highlight=False
         )
 
 
+@app.command()
+def status(
+    profile: Optional[str] = typer.Option(None, "--profile", "-p", help="Compose profile (dev/prod)"),
+    watch: Optional[float] = typer.Option(
+        None,
+        "--watch",
+        "-w",
+        min=0.5,
+        help="Refresh the status every N seconds (at least 0.5) until interrupted"
+    ),
+):
+    """Display service status."""
+    if not validate_environment():
+        raise typer.Exit(1)
+
+    manager = get_manager(profile)
+
+    if watch is None:
+        _print_status(manager)
+        return
+
+    try:
+        while True:
+            console.clear()
+            _print_status(manager)
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        pass
+
+
 @app.command()
 def setup(
     force: bool = typer.Option(
@@ -284,6 +351,17 @@ def setup(
         "--all",
         help="Clone all services including disabled ones (default: enabled only)"
     ),
+    jobs: Optional[int] = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of repositories to clone in parallel (default: up to 8)"
+    ),
+    full_history: bool = typer.Option(
+        False,
+        "--full-history",
+        help="Clone full git history (default: shallow clone of the configured branch)"
+    ),
     create_config: bool = typer.Option(
         False,
         "--create-config",
@@ -299,18 +377,19 @@ def setup(
     into the services/ directory. Each service becomes an independent git
     repository that is ignored by the parent integration repo.
     """
-    config = Config()
+    config = get_config()
 
     # Create example config if requested
     if create_config:
-        services_config_file = config.root_dir / "services.yml"
-        if services_config_file.exists() and not force:
+        services_config_file = config.services_config_file
+        if path_exists(services_config_file) and not force:
             console.print(
                 f"[yellow]Configuration file already exists at {services_config_file}[/yellow]\n"
                 "[dim]Use --force to overwrite[/dim]"
             )
         else:
             create_services_config_example(services_config_file)
+            path_exists.cache_clear()
         return
 
     # Get service repositories from config (filter by enabled unless --all is specified)
@@ -337,10 +416,150 @@ def setup(
         console.print("[bold blue]Setting up all service repositories (including disabled)...[/bold blue]\n")
     else:
         console.print("[bold blue]Setting up enabled service repositories...[/bold blue]\n")
-    clone_services(service_repos, config.services_dir, force=force)
+    clone_services(
+        service_repos,
+        config.services_dir,
+        force=force,
+        jobs=jobs,
+        full_history=full_history
+    )
     console.print("\n[green]✓[/green] Setup completed")
 
 
+def _build_services(
+    builds: List[Tuple[str, BuildConfig]],
+    services_dir: Path,
+    no_docker: bool,
+    force_rebuild: bool = False,
+    output: Optional[Console] = None
+) -> List[str]:
+    """Build services one after another (source, then Docker image).
+
+    Services whose build inputs are unchanged since their last successful build
+    are skipped unless force_rebuild is set.
+
+    Args:
+        builds: List of (service name, build configuration) pairs.
+        services_dir: Directory containing the service repositories.
+        no_docker: If True, skip Docker image builds.
+        force_rebuild: If True, build even when the build stamp is up to date.
+        output: Console to write to. When given, build output is captured into it.
+
+    Returns:
+        List of failed build names.
+    """
+    out = output or console
+    failed_services = []
+
+    for svc_name, build_config in builds:
+        out.print(f"[cyan]Building {svc_name}...[/cyan]")
+
+        # Get service path - use working_directory if specified, otherwise use service name
+        working_dir = build_config.working_directory
+        if working_dir:
+            service_path = services_dir / working_dir
+        else:
+            service_path = services_dir / svc_name
+
+        docker = not no_docker and bool(build_config.docker_build_command)
+        stamp_file = services_dir / BUILD_STAMP_DIR / svc_name
+
+        if not force_rebuild and stamp_file.exists():
+            stamp = compute_build_stamp(service_path, build_config, docker=docker)
+            if stamp and stamp_file.read_text() == stamp:
+                out.print("[dim]Unchanged since last build, skipping[/dim]\n")
+                continue
+
+        # Drop any earlier stamp; a new one is written only if every build step succeeds
+        stamp_file.unlink(missing_ok=True)
+
+        # Build from source first
+        success = build_service(svc_name, service_path, build_config, docker=False, output=output)
+
+        if not success:
+            failed_services.append(svc_name)
+            out.print()  # Empty line between services
+            continue
+
+        # Build Docker image if not skipped
+        if not no_docker:
+            # Check if docker build command exists
+            if build_config.docker_build_command:
+                success_docker = build_service(
+                    svc_name, service_path, build_config, docker=True, output=output
+                )
+                if not success_docker:
+                    failed_services.append(f"{svc_name} (Docker)")
+                    out.print()  # Empty line between services
+                    continue
+            # If no docker build command, that's okay - just skip it
+
+        # Record the inputs of this successful build
+        stamp = compute_build_stamp(service_path, build_config, docker=docker)
+        if stamp:
+            stamp_file.parent.mkdir(parents=True, exist_ok=True)
+            stamp_file.write_text(stamp)
+
+        out.print()  # Empty line between services
+
+    return failed_services
+
+
+def _build_services_parallel(
+    build_configs: Dict[str, BuildConfig],
+    services_dir: Path,
+    no_docker: bool,
+    jobs: int,
+    force_rebuild: bool = False
+) -> List[str]:
+    """Build services concurrently, serializing builds that share a working directory.
+
+    Each worker writes into its own buffered console, which is flushed to the
+    terminal as soon as that worker finishes so output never interleaves.
+
+    Args:
+        build_configs: Dictionary mapping service names to build configurations.
+        services_dir: Directory containing the service repositories.
+        no_docker: If True, skip Docker image builds.
+        jobs: Maximum number of concurrent workers.
+        force_rebuild: If True, build even when the build stamp is up to date.
+
+    Returns:
+        List of failed build names, in build configuration order.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # Services sharing a working directory (e.g. the f1r3sky-backend-* builds)
+    # must not build concurrently, so group them into one serial worker.
+    groups: Dict[str, List[Tuple[str, BuildConfig]]] = {}
+    for svc_name, build_config in build_configs.items():
+        working_dir = build_config.working_directory or svc_name
+        groups.setdefault(working_dir, []).append((svc_name, build_config))
+
+    def run_group(builds: List[Tuple[str, BuildConfig]]) -> Tuple[str, List[str]]:
+        buffer = create_buffered_console()
+        failed = _build_services(
+            builds, services_dir, no_docker, force_rebuild=force_rebuild, output=buffer
+        )
+        return buffer.file.getvalue(), failed
+
+    max_workers = min(jobs, len(groups))
+    console.print(f"[dim]Running {len(groups)} build group(s), {max_workers} at a time...[/dim]\n")
+
+    failed_services = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_group, builds) for builds in groups.values()]
+        for future in as_completed(futures):
+            output, failed = future.result()
+            console.file.write(output)
+            console.file.flush()
+            failed_services.extend(failed)
+
+    order = {name: index for index, name in enumerate(build_configs)}
+    failed_services.sort(key=lambda name: order[name.split(" ", 1)[0]])
+    return failed_services
+
+
 @app.command(name="build-service")
 def build_service_cmd(
     service: Optional[str] = typer.Argument(None, help="Service name to build"),
@@ -361,6 +580,17 @@ def build_service_cmd(
         "-a",
         help="Build all enabled services (without service arg) or show disabled services (with --list)"
     ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        help="Number of services to build in parallel with -a (output is shown per service)"
+    ),
+    force_rebuild: bool = typer.Option(
+        False,
+        "--force-rebuild",
+        help="With -a, rebuild services even if nothing changed since their last build"
+    ),
 ):
     """Build a service using its configured build commands.
 
@@ -375,10 +605,12 @@ def build_service_cmd(
         shardctl build-service f1r3node --no-docker  # Build source only
         shardctl build-service -a                 # Build all enabled services (source + Docker)
         shardctl build-service -a --no-docker     # Build all enabled services (source only)
+        shardctl build-service -a -j 4            # Build up to 4 services in parallel
+        shardctl build-service -a --force-rebuild # Rebuild even unchanged services
         shardctl build-service --list             # List enabled services
         shardctl build-service --list --all       # List all services (including disabled)
     """
-    config = Config()
+    config = get_config()
 
     # List services if requested
     if list_services:
@@ -396,14 +628,14 @@ def build_service_cmd(
 
         # Simple list output - one service per line
         for svc_name, cfg in build_configs.items():
-            build_cmd = cfg.get("build_command", "N/A")
-            docker_cmd = cfg.get("docker_build_command", "N/A")
-            env = cfg.get("environment", "default")
+            build_cmd = cfg.build_command or "N/A"
+            docker_cmd = cfg.docker_build_command
+            env = cfg.environment or "default"
 
             # Format: SERVICE_NAME (env: ENVIRONMENT)
             console.print(f"[cyan]{svc_name}[/cyan] [dim](env: {env})[/dim]")
             console.print(f"  Build: {build_cmd}")
-            if docker_cmd != "N/A":
+            if docker_cmd:
                 console.print(f"  Docker: {docker_cmd}")
             console.print()  # Empty line between services
 
@@ -421,35 +653,17 @@ def build_service_cmd(
         else:
             console.print(f"[bold blue]Building {len(build_configs)} enabled service(s) (source + Docker)...[/bold blue]\n")
 
-        failed_services = []
-        for svc_name, build_config in build_configs.items():
-            console.print(f"[cyan]Building {svc_name}...[/cyan]")
-
-            # Get service path - use working_directory if specified, otherwise use service name
-            working_dir = build_config.get("working_directory")
-            if working_dir:
-                service_path = config.services_dir / working_dir
-            else:
-                service_path = config.services_dir / svc_name
-
-            # Build from source first
-            success = build_service(svc_name, service_path, build_config, docker=False)
-
-            if not success:
-                failed_services.append(svc_name)
-                console.print()  # Empty line between services
-                continue
-
-            # Build Docker image if not skipped
-            if not no_docker:
-                # Check if docker build command exists
-                if build_config.get("docker_build_command"):
-                    success_docker = build_service(svc_name, service_path, build_config, docker=True)
-                    if not success_docker:
-                        failed_services.append(f"{svc_name} (Docker)")
-                # If no docker build command, that's okay - just skip it
-
-            console.print()  # Empty line between services
+        if jobs > 1:
+            failed_services = _build_services_parallel(
+                build_configs, config.services_dir, no_docker, jobs, force_rebuild=force_rebuild
+            )
+        else:
+            failed_services = _build_services(
+                list(build_configs.items()),
+                config.services_dir,
+                no_docker,
+                force_rebuild=force_rebuild
+            )
 
         if failed_services:
             console.print(f"[red]✗[/red] {len(failed_services)} build(s) failed: {', '.join(failed_services)}")
@@ -475,7 +689,7 @@ def build_service_cmd(
         raise typer.Exit(1)
 
     # Get service path - use working_directory if specified, otherwise use service name
-    working_dir = build_config.get("working_directory")
+    working_dir = build_config.working_directory
     if working_dir:
         service_path = config.services_dir / working_dir
     else:
@@ -490,7 +704,7 @@ def build_service_cmd(
     # Build Docker image if not skipped
     if not no_docker:
         # Check if docker build command exists
-        if build_config.get("docker_build_command"):
+        if build_config.docker_build_command:
             success_docker = build_service(service, service_path, build_config, docker=True)
             if not success_docker:
                 raise typer.Exit(1)
@@ -518,14 +732,26 @@ def compose(
 
 
 @app.callback()
-def main():
+def main(
+    verbose: bool = typer.Option(
+        False,
+        "--verbose",
+        help="Always print the docker compose commands being run"
+    ),
+    minimal_env: bool = typer.Option(
+        False,
+        "--minimal-env",
+        help="Pass docker compose only the environment variables it needs"
+    ),
+):
     """
     shardctl - Microservices Management CLI
 
     A convenience wrapper around docker-compose for managing multiple
     microservices with support for profiles and streamlined workflows.
     """
-    pass
+    utils.VERBOSE = verbose
+    utils.MINIMAL_ENV = minimal_env
 
 
 if __name__ == "__main__":
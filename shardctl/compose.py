@@ -1,16 +1,60 @@
 """Docker Compose management wrapper."""
 
+import os
+import re
+import shlex
 import subprocess
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set
 
+import yaml
 from rich.console import Console
+from rich.markup import escape
 
+from . import utils
 from .config import Config
 
 console = Console()
 
+# Variables kept in the child environment with --minimal-env, besides any
+# variable referenced by the active compose files
+CHILD_ENV_VARS = (
+    "PATH",
+    "HOME",
+    "USER",
+    "TERM",
+    "LANG",
+    "LC_ALL",
+    "XDG_RUNTIME_DIR",
+    "SSH_AUTH_SOCK",
+)
+
+# Variable name prefixes that docker and docker compose read from the environment
+CHILD_ENV_PREFIXES = ("DOCKER_", "COMPOSE_", "BUILDKIT_")
+
+# Matches $VAR and ${VAR...} interpolation in compose files
+_COMPOSE_VAR_PATTERN = re.compile(r"\$\{?([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def _pass_through_names(entries: Any) -> List[str]:
+    """Get the variables a compose environment or args section passes through.
+
+    Entries given as a bare name (list form) or with no value (mapping form) take
+    their value from the environment docker compose runs in.
+
+    Args:
+        entries: Service 'environment' or build 'args' section, as a list or mapping.
+
+    Returns:
+        List of variable names.
+    """
+    if isinstance(entries, dict):
+        return [name for name, value in entries.items() if value is None]
+    if isinstance(entries, list):
+        return [entry for entry in entries if isinstance(entry, str) and "=" not in entry]
+    return []
+
 
 class ComposeManager:
     """Manager class for wrapping docker-compose commands."""
@@ -24,26 +68,183 @@ class ComposeManager:
         """
         self.config = config
         self.profile = profile
+        self._docker = None
+        # Compose files and profile are fixed for the manager's lifetime
+        self._compose_files = tuple(self.config.get_compose_files_for_profile(self.profile))
+        self._base_cmd = tuple(self._build_base_command())
+        self._child_env = self._build_child_env()
+
+    def _build_child_env(self) -> Dict[str, str]:
+        """Build the environment for docker-compose subprocesses.
+
+        Compose files are passed through COMPOSE_FILE rather than -f flags. With
+        --minimal-env, only the variables docker needs plus every variable the
+        active compose files (and the files they include or extend) interpolate
+        or pass through are kept, so compose behaves as with the full environment.
+
+        Returns:
+            Environment dictionary for child processes.
+        """
+        if utils.MINIMAL_ENV:
+            names = set(CHILD_ENV_VARS) | self._referenced_env_vars()
+
+            env = {
+                key: value
+                for key, value in os.environ.items()
+                if key in names or key.startswith(CHILD_ENV_PREFIXES) or key.startswith("LC_")
+            }
+        else:
+            env = dict(os.environ)
+
+        if self._compose_files:
+            env["COMPOSE_FILE"] = os.pathsep.join(str(f) for f in self._compose_files)
+            env.pop("COMPOSE_PATH_SEPARATOR", None)
+
+        return env
+
+    def _referenced_env_vars(self) -> Set[str]:
+        """Collect the environment variables the active compose files read.
+
+        Covers $VAR/${VAR} interpolation and bare pass-through entries (a name
+        without a value under a service's environment or build args), following
+        files pulled in through include and extends.
+
+        Returns:
+            Set of variable names.
+        """
+        names: Set[str] = set()
+        pending = list(self._compose_files)
+        seen: Set[Path] = set()
+
+        while pending:
+            compose_file = pending.pop()
+            if compose_file in seen:
+                continue
+            seen.add(compose_file)
+
+            try:
+                names.update(_COMPOSE_VAR_PATTERN.findall(compose_file.read_text()))
+                document = self.config._load_yaml(compose_file)
+            except (OSError, yaml.YAMLError):
+                continue
+            if not isinstance(document, dict):
+                continue
+
+            base_dir = compose_file.parent
+
+            for entry in document.get("include") or []:
+                paths = entry.get("path") if isinstance(entry, dict) else entry
+                if isinstance(paths, str):
+                    paths = [paths]
+                pending.extend(base_dir / path for path in paths or [])
+
+            for service in (document.get("services") or {}).values():
+                if not isinstance(service, dict):
+                    continue
+
+                names.update(_pass_through_names(service.get("environment")))
+                build = service.get("build")
+                if isinstance(build, dict):
+                    names.update(_pass_through_names(build.get("args")))
+
+                extends = service.get("extends")
+                if isinstance(extends, dict) and extends.get("file"):
+                    pending.append(base_dir / extends["file"])
+
+        return names
+
+    def _docker_client(self):
+        """Get a Docker SDK client for read-only queries.
+
+        The client is created on first use and reused for the lifetime of the manager.
+
+        Returns:
+            docker.DockerClient instance, or None if the SDK is not installed or the
+            daemon is unreachable.
+        """
+        if self._docker is None:
+            try:
+                import docker
+                self._docker = docker.from_env()
+            except Exception:
+                self._docker = False
+
+        return self._docker or None
+
+    def _dotenv_value(self, key: str) -> Optional[str]:
+        """Read a variable from the project's .env file, as docker compose does.
+
+        Args:
+            key: Variable name.
+
+        Returns:
+            The variable's value, or None if the file or variable is missing.
+        """
+        try:
+            lines = (self.config.root_dir / ".env").read_text().splitlines()
+        except OSError:
+            return None
+
+        for line in lines:
+            line = line.strip()
+            if line.startswith("export "):
+                line = line[len("export "):].lstrip()
+            name, sep, value = line.partition("=")
+            if sep and name.strip() == key:
+                value = value.strip()
+                if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+                    value = value[1:-1]
+                return value
+
+        return None
+
+    def _project_name(self) -> str:
+        """Get the compose project name, resolved the same way docker compose does.
+
+        Returns:
+            Normalized project name.
+        """
+        name = (
+            os.environ.get("COMPOSE_PROJECT_NAME")
+            or self._dotenv_value("COMPOSE_PROJECT_NAME")
+            or self.config.load_compose_config(self.profile).get("name")
+            or self.config.root_dir.name
+        )
+        return re.sub(r"[^a-z0-9_-]", "", name.lower())
 
     def _build_base_command(self) -> List[str]:
-        """Build base docker-compose command with file flags.
+        """Build base docker-compose command.
+
+        Compose files are selected through COMPOSE_FILE in the child environment.
 
         Returns:
             List of command parts for docker-compose.
         """
         cmd = ["docker", "compose"]
 
-        # Add compose files with -f flags
-        compose_files = self.config.get_compose_files_for_profile(self.profile)
-        for compose_file in compose_files:
-            cmd.extend(["-f", str(compose_file)])
-
         # Add profile flag if specified
         if self.profile:
             cmd.extend(["--profile", self.profile])
 
         return cmd
 
+    def _echo_command(self, full_command: List[str]):
+        """Print a command line before running it.
+
+        Only printed on an interactive terminal or when --verbose is set, so piped
+        output is not cluttered and the command line is not formatted needlessly.
+
+        Args:
+            full_command: Command parts about to be executed.
+        """
+        if console.is_terminal or utils.VERBOSE:
+            command_line = shlex.join(full_command)
+            if "COMPOSE_FILE" in self._child_env:
+                compose_file = shlex.quote(self._child_env["COMPOSE_FILE"])
+                command_line = f"COMPOSE_FILE={compose_file} {command_line}"
+            # soft_wrap keeps the (often long) command on one line so it can be copied
+            console.print(f"[dim]$ {escape(command_line)}[/dim]", soft_wrap=True)
+
     def _run_command(
         self,
         command: List[str],
@@ -60,25 +261,50 @@ class ComposeManager:
         Returns:
             CompletedProcess instance.
         """
-        full_command = self._build_base_command() + command
+        full_command = list(self._base_cmd) + command
 
-        console.print(f"[dim]$ {' '.join(full_command)}[/dim]")
+        self._echo_command(full_command)
 
         if capture_output:
             result = subprocess.run(
                 full_command,
                 capture_output=True,
                 text=True,
-                check=check
+                check=check,
+                env=self._child_env
             )
         else:
             result = subprocess.run(
                 full_command,
-                check=check
+                check=check,
+                env=self._child_env
             )
 
         return result
 
+    def _exec_replace(self, command: List[str]):
+        """Replace the current process with a docker-compose command.
+
+        Used for pass-through commands where shardctl has nothing left to do once
+        docker-compose starts. The exit code of docker-compose becomes the exit
+        code of shardctl. Falls back to _run_command on Windows.
+
+        Args:
+            command: Command parts to execute.
+        """
+        if os.name == "nt":
+            self._run_command(command)
+            return
+
+        full_command = list(self._base_cmd) + command
+
+        self._echo_command(full_command)
+
+        # Flush buffered output before the process image is replaced
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvpe(full_command[0], full_command, self._child_env)
+
     def up(self, services: Optional[List[str]] = None, detached: bool = True, build: bool = False):
         """Start services.
 
@@ -154,7 +380,10 @@ class ComposeManager:
         if services:
             cmd.extend(services)
 
-        self._run_command(cmd)
+        if follow:
+            self._exec_replace(cmd)
+        else:
+            self._run_command(cmd)
 
     def restart(self, services: Optional[List[str]] = None):
         """Restart services.
@@ -202,7 +431,7 @@ class ComposeManager:
         cmd.append(service)
         cmd.extend(command)
 
-        self._run_command(cmd)
+        self._exec_replace(cmd)
 
     def shell(self, service: str, shell_cmd: str = "/bin/bash"):
         """Open a shell in a running service container.
@@ -232,33 +461,62 @@ class ComposeManager:
         Args:
             args: Command arguments to pass to docker-compose.
         """
-        self._run_command(args)
+        self._exec_replace(args)
 
     def get_status(self) -> List[dict]:
         """Get status information for all services.
 
+        Uses the Docker SDK when it is installed, falling back to
+        'docker compose ps' otherwise or when the SDK finds no containers.
+
         Returns:
             List of service status dictionaries.
         """
+        client = self._docker_client()
+        if client:
+            try:
+                services = self._get_status_sdk(client)
+                if services:
+                    return services
+            except Exception as e:
+                if utils.VERBOSE:
+                    console.print(
+                        f"[dim]Docker SDK status query failed, using docker compose ps: "
+                        f"{escape(str(e))}[/dim]"
+                    )
+
         try:
-            result = self._run_command(
-                ["ps", "--format", "json"],
-                capture_output=True,
-                check=True
-            )
+            full_command = list(self._base_cmd) + ["ps", "--format", "json"]
+
+            self._echo_command(full_command)
 
-            # Parse JSON output
-            import json
+            # Parse JSON output, using orjson when it is installed
+            try:
+                import orjson as json
+            except ImportError:
+                import json
             services = []
 
-            # docker-compose ps --format json outputs one JSON object per line
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    try:
-                        service_info = json.loads(line)
-                        services.append(service_info)
-                    except json.JSONDecodeError:
-                        pass
+            # docker-compose ps --format json outputs one JSON object per line;
+            # parse each line as it arrives instead of buffering the whole output
+            with subprocess.Popen(
+                full_command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                env=self._child_env
+            ) as proc:
+                for line in proc.stdout:
+                    line = line.strip()
+                    if line:
+                        try:
+                            service_info = json.loads(line)
+                            services.append(service_info)
+                        except ValueError:
+                            pass
+
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, full_command)
 
             return services
 
@@ -268,3 +526,45 @@ class ComposeManager:
         except Exception as e:
             console.print(f"[yellow]Warning: Error getting service status: {e}[/yellow]")
             return []
+
+    def _get_status_sdk(self, client) -> List[dict]:
+        """Get status information for all services from the Docker API.
+
+        Issues a single container list request over the daemon socket instead of
+        spawning 'docker compose ps'.
+
+        Args:
+            client: Docker SDK client.
+
+        Returns:
+            List of service status dictionaries in 'docker compose ps' JSON format.
+        """
+        containers = client.api.containers(
+            filters={
+                "label": [
+                    f"com.docker.compose.project={self._project_name()}",
+                    # Leave out 'docker compose run' containers, like 'docker compose ps'
+                    "com.docker.compose.oneoff=False",
+                ]
+            }
+        )
+
+        services = []
+        for container in containers:
+            labels = container.get("Labels") or {}
+            names = container.get("Names") or []
+            services.append({
+                "Name": names[0].lstrip("/") if names else "N/A",
+                "Service": labels.get("com.docker.compose.service", "N/A"),
+                "State": container.get("State", "N/A"),
+                "Status": container.get("Status", "N/A"),
+                "Publishers": [
+                    {
+                        "PublishedPort": port.get("PublicPort", 0),
+                        "TargetPort": port.get("PrivatePort", 0),
+                    }
+                    for port in container.get("Ports") or []
+                ],
+            })
+
+        return sorted(services, key=lambda service: service["Name"])
@@ -1,15 +1,78 @@
 """Configuration management for shardctl."""
 
+import functools
 import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+
+@functools.lru_cache(maxsize=None)
+def path_exists(path: Path) -> bool:
+    """Check whether a path exists, caching the result for the process lifetime.
+
+    Call ``path_exists.cache_clear()`` after creating or removing files or
+    directories that may have been probed.
+
+    Args:
+        path: Path to check.
+
+    Returns:
+        True if the path exists, False otherwise.
+    """
+    return path.exists()
+
+
+@dataclass(frozen=True)
+class BuildConfig:
+    """Build configuration for a service, as declared under 'builds' in services.yml."""
+
+    build_command: Optional[str] = None
+    docker_build_command: Optional[str] = None
+    environment: Optional[str] = None
+    working_directory: Optional[str] = None
+    docker_image: Optional[str] = None
+    binary_path: Optional[str] = None
+    pre_build_steps: Tuple[str, ...] = ()
+    docker_pre_build_steps: Tuple[str, ...] = ()
+    dependencies: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BuildConfig":
+        """Create a BuildConfig from a services.yml build entry.
+
+        Args:
+            data: Build entry from services.yml. Unknown keys are ignored.
+
+        Returns:
+            BuildConfig instance.
+        """
+        return cls(
+            build_command=data.get('build_command'),
+            docker_build_command=data.get('docker_build_command'),
+            environment=data.get('environment'),
+            working_directory=data.get('working_directory'),
+            docker_image=data.get('docker_image'),
+            binary_path=data.get('binary_path'),
+            pre_build_steps=tuple(data.get('pre_build_steps') or ()),
+            docker_pre_build_steps=tuple(data.get('docker_pre_build_steps') or ()),
+            dependencies=tuple(data.get('dependencies') or ()),
+        )
+
 
 class Config:
     """Configuration class for managing paths and settings."""
 
+    # Parsed YAML documents keyed by path, stored with the file's mtime at parse time
+    _yaml_cache: Dict[Path, Tuple[int, Any]] = {}
+
     def __init__(self, root_dir: Optional[Path] = None):
         """Initialize configuration with root directory.
 
@@ -20,12 +83,47 @@ class Config:
         self.services_dir = self.root_dir / "services"
         self.compose_file = self.root_dir / "docker-compose.yml"
         self.compose_dev_file = self.root_dir / "docker-compose.dev.yml"
+        self.services_config_file = self.root_dir / "services.yml"
+
+    @classmethod
+    def _load_yaml(cls, path: Path) -> Any:
+        """Load a YAML file, reusing the parsed result while the file is unchanged.
+
+        Args:
+            path: Path to the YAML file.
+
+        Returns:
+            Parsed YAML document. The result is shared between calls and must not be mutated.
+        """
+        mtime = path.stat().st_mtime_ns
+        cached = cls._yaml_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        # Hand libyaml the raw bytes; it detects the encoding itself
+        with open(path, 'rb') as f:
+            data = yaml.load(f.read(), Loader=_Loader)
+
+        cls._yaml_cache[path] = (mtime, data)
+        return data
+
+    def _load_services_yml(self) -> Dict:
+        """Load services.yml through the parsed YAML cache.
+
+        Returns:
+            Parsed services configuration, or an empty dictionary if the file is
+            missing or empty.
+        """
+        try:
+            return self._load_yaml(self.services_config_file) or {}
+        except FileNotFoundError:
+            return {}
 
     @property
     def compose_files(self) -> List[Path]:
         """Get list of compose files that exist."""
         files = []
-        if self.compose_file.exists():
+        if path_exists(self.compose_file):
             files.append(self.compose_file)
         return files
 
@@ -40,10 +138,10 @@ class Config:
         """
         files = [self.compose_file]
 
-        if profile == "dev" and self.compose_dev_file.exists():
+        if profile == "dev":
             files.append(self.compose_dev_file)
 
-        return [f for f in files if f.exists()]
+        return [f for f in files if path_exists(f)]
 
     def load_compose_config(self, profile: Optional[str] = None) -> Dict:
         """Load and merge compose configuration.
@@ -52,21 +150,30 @@ class Config:
             profile: Profile name to load configuration for.
 
         Returns:
-            Merged compose configuration as dictionary.
+            Merged compose configuration as dictionary. It may be the cached parsed
+            document itself and must not be mutated.
         """
-        config = {}
+        compose_files = self.get_compose_files_for_profile(profile)
+
+        if not compose_files:
+            return {}
+
+        # Common case (no dev overrides): nothing to merge
+        config = self._load_yaml(compose_files[0]) or {}
 
-        for compose_file in self.get_compose_files_for_profile(profile):
-            with open(compose_file, 'r') as f:
-                file_config = yaml.safe_load(f)
-                if file_config:
-                    config = self._merge_configs(config, file_config)
+        for compose_file in compose_files[1:]:
+            file_config = self._load_yaml(compose_file)
+            if file_config:
+                config = self._merge_configs(config, file_config)
 
         return config
 
     def _merge_configs(self, base: Dict, override: Dict) -> Dict:
         """Merge two configuration dictionaries.
 
+        Neither input is modified: nested dictionaries are copied only where the
+        override descends into them, and everything else is shared.
+
         Args:
             base: Base configuration.
             override: Configuration to merge in.
@@ -75,27 +182,34 @@ class Config:
             Merged configuration.
         """
         result = base.copy()
-
-        for key, value in override.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self._merge_configs(result[key], value)
-            else:
-                result[key] = value
+        stack = [(result, override)]
+
+        while stack:
+            target, source = stack.pop()
+            for key, value in source.items():
+                current = target.get(key)
+                if isinstance(current, dict) and isinstance(value, dict):
+                    # Copy before descending so the base (possibly cached) is untouched
+                    merged = current.copy()
+                    target[key] = merged
+                    stack.append((merged, value))
+                else:
+                    target[key] = value
 
         return result
 
-    def get_service_names(self, profile: Optional[str] = None) -> List[str]:
-        """Get list of service names from compose configuration.
+    def get_service_names(self, profile: Optional[str] = None) -> Tuple[str, ...]:
+        """Get service names from compose configuration.
 
         Args:
             profile: Profile name to get services for.
 
         Returns:
-            List of service names.
+            Tuple of service names.
         """
         config = self.load_compose_config(profile)
         services = config.get('services', {})
-        return list(services.keys())
+        return tuple(services)
 
     def is_service_enabled(self, service_name: str) -> bool:
         """Check if a service is enabled.
@@ -106,26 +220,19 @@ class Config:
         Returns:
             True if service is enabled (or enabled field is missing), False otherwise.
         """
-        services_config_file = self.root_dir / "services.yml"
+        repos = self._load_services_yml().get('repositories', {})
 
-        if not services_config_file.exists():
+        if service_name not in repos:
             return True
 
-        with open(services_config_file, 'r') as f:
-            services_config = yaml.safe_load(f)
-            repos = services_config.get('repositories', {})
-
-            if service_name not in repos:
-                return True
-
-            repo_config = repos[service_name]
+        repo_config = repos[service_name]
 
-            # Handle old format (string URL)
-            if isinstance(repo_config, str):
-                return True
+        # Handle old format (string URL)
+        if isinstance(repo_config, str):
+            return True
 
-            # Handle new format (dict) - default to True if enabled field is missing
-            return repo_config.get('enabled', True)
+        # Handle new format (dict) - default to True if enabled field is missing
+        return repo_config.get('enabled', True)
 
     def get_service_repos(self, only_enabled: bool = True) -> Dict[str, Dict]:
         """Get mapping of service names to their repository configuration.
@@ -137,60 +244,41 @@ class Config:
             Dictionary mapping service names to repository config (url, branch, enabled, etc).
             For backward compatibility, also supports simple string URLs.
         """
-        # Check for services.yml configuration
-        services_config_file = self.root_dir / "services.yml"
-
-        if services_config_file.exists():
-            with open(services_config_file, 'r') as f:
-                services_config = yaml.safe_load(f)
-                repos = services_config.get('repositories', {})
-
-                # Normalize to dict format
-                normalized = {}
-                for name, config in repos.items():
-                    if isinstance(config, str):
-                        # Old format: just URL string
-                        normalized[name] = {'url': config, 'branch': None, 'enabled': True}
-                    else:
-                        # New format: dict with url and branch
-                        # Default enabled to True if not specified
-                        service_config = config.copy()
-                        if 'enabled' not in service_config:
-                            service_config['enabled'] = True
-                        normalized[name] = service_config
-
-                # Filter by enabled status if requested
-                if only_enabled:
-                    normalized = {
-                        name: config
-                        for name, config in normalized.items()
-                        if config.get('enabled', True)
-                    }
-
-                return normalized
-
-        return {}
-
-    def get_service_build_config(self, service_name: str) -> Optional[Dict]:
+        repos = self._load_services_yml().get('repositories', {})
+
+        # Normalize to dict format and filter by enabled status in one pass
+        normalized = {}
+        for name, config in repos.items():
+            if isinstance(config, str):
+                # Old format: just URL string, always enabled
+                normalized[name] = {'url': config, 'branch': None, 'enabled': True}
+                continue
+
+            if only_enabled and not config.get('enabled', True):
+                continue
+
+            # New format: dict with url and branch. Copied, since the parsed
+            # services.yml is cached; enabled defaults to True if not specified.
+            normalized[name] = {'enabled': True, **config}
+
+        return normalized
+
+    def get_service_build_config(self, service_name: str) -> Optional[BuildConfig]:
         """Get build configuration for a specific service.
 
         Args:
             service_name: Name of the service.
 
         Returns:
-            Dictionary with build configuration, or None if not found.
+            Build configuration, or None if not found.
         """
-        services_config_file = self.root_dir / "services.yml"
-
-        if services_config_file.exists():
-            with open(services_config_file, 'r') as f:
-                services_config = yaml.safe_load(f)
-                builds = services_config.get('builds', {})
-                return builds.get(service_name)
+        build_config = self._load_services_yml().get('builds', {}).get(service_name)
+        if build_config:
+            return BuildConfig.from_dict(build_config)
 
         return None
 
-    def get_all_build_configs(self, only_enabled: bool = True) -> Dict[str, Dict]:
+    def get_all_build_configs(self, only_enabled: bool = True) -> Dict[str, BuildConfig]:
         """Get all service build configurations.
 
         Args:
@@ -199,41 +287,25 @@ class Config:
         Returns:
             Dictionary mapping service names to their build configurations.
         """
-        services_config_file = self.root_dir / "services.yml"
-
-        if services_config_file.exists():
-            with open(services_config_file, 'r') as f:
-                services_config = yaml.safe_load(f)
-                builds = services_config.get('builds', {})
-
-                # Filter by enabled status if requested
-                if only_enabled:
-                    # Get repositories to check enabled status
-                    repos = services_config.get('repositories', {})
-                    filtered_builds = {}
-
-                    for service_name, build_config in builds.items():
-                        # Check if service exists in repositories
-                        if service_name in repos:
-                            repo_config = repos[service_name]
-                            # Handle old format (string URL)
-                            if isinstance(repo_config, str):
-                                is_enabled = True
-                            else:
-                                # Handle new format (dict) - default to True
-                                is_enabled = repo_config.get('enabled', True)
-
-                            if is_enabled:
-                                filtered_builds[service_name] = build_config
-                        else:
-                            # Service not in repositories - include it (for services that only have builds)
-                            filtered_builds[service_name] = build_config
-
-                    return filtered_builds
-
-                return builds
-
-        return {}
+        services_config = self._load_services_yml()
+        builds = services_config.get('builds', {})
+        disabled = set()
+
+        # Filter by enabled status if requested. Services that only have builds
+        # (not in repositories) and old-format string URLs count as enabled.
+        if only_enabled:
+            repos = services_config.get('repositories', {})
+            disabled = {
+                service_name
+                for service_name, repo_config in repos.items()
+                if isinstance(repo_config, dict) and not repo_config.get('enabled', True)
+            }
+
+        return {
+            service_name: BuildConfig.from_dict(build_config)
+            for service_name, build_config in builds.items()
+            if service_name not in disabled
+        }
 
     def ensure_services_dir(self):
         """Ensure services directory exists."""
@@ -241,3 +313,16 @@ class Config:
         gitkeep = self.services_dir / ".gitkeep"
         if not gitkeep.exists():
             gitkeep.touch()
+
+
+@functools.lru_cache(maxsize=None)
+def get_config(root_dir: Optional[Path] = None) -> Config:
+    """Get the shared Config instance for a root directory.
+
+    Args:
+        root_dir: Root directory of the integration repo. Defaults to current working directory.
+
+    Returns:
+        Config instance, created on first use and reused afterwards.
+    """
+    return Config(root_dir)
@@ -1,26 +1,177 @@
 """Utility functions for shardctl."""
 
+import functools
+import hashlib
+import io
+import os
+import shutil
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+
+from .config import BuildConfig, path_exists
 
 console = Console()
 
+# Set by the --verbose root option to echo docker compose commands even when not on a terminal
+VERBOSE = False
+
+# Environment for git clones: fail instead of prompting for credentials, since
+# clones run in parallel with their output captured
+_GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+# Directory under services/ holding the last successful build stamp per service
+BUILD_STAMP_DIR = ".shardctl-build-stamps"
+
+# Set by the --minimal-env root option to run docker compose with a reduced environment
+MINIMAL_ENV = False
+
+
+def create_buffered_console() -> Console:
+    """Create a console that renders into memory instead of the terminal.
+
+    Used by worker threads so their output can be written out in one piece
+    without contending on the shared console. It matches the terminal's width
+    and color support but skips Rich's automatic syntax highlighting.
+
+    Returns:
+        Console whose rendered output is available via ``console.file.getvalue()``.
+    """
+    return Console(
+        file=io.StringIO(),
+        force_terminal=console.is_terminal,
+        no_color=console.no_color,
+        color_system=console.color_system,
+        highlight=False,
+        width=console.width
+    )
+
+
+def _clone_service(
+    service_name: str,
+    repo_config: Dict,
+    service_path: Path,
+    force: bool = False,
+    full_history: bool = False
+) -> str:
+    """Clone a single service repository, buffering all console output.
+
+    Args:
+        service_name: Name of the service.
+        repo_config: Normalized repository config with at least a 'url' key.
+        service_path: Directory to clone the service into.
+        force: If True, remove an existing service directory before cloning.
+        full_history: If True, clone all history, overriding the repository's 'depth' setting.
+
+    Returns:
+        Rendered console output for this service.
+    """
+    out = create_buffered_console()
+
+    # Extract URL, branch and clone depth ('full' or 0 for complete history)
+    repo_url = repo_config['url']
+    branch = repo_config.get('branch')
+    depth = repo_config.get('depth', 1)
+    if full_history or depth == 'full':
+        depth = None
+
+    remover = None
+
+    # Check if service already exists
+    if service_path.exists():
+        if force:
+            try:
+                if os.name == "nt":
+                    shutil.rmtree(service_path)
+                else:
+                    # Move the old checkout aside and delete it with rm -rf in the
+                    # background, so the clone can start straight away
+                    trash_dir = Path(tempfile.mkdtemp(
+                        prefix=f".{service_name}-removing-", dir=service_path.parent
+                    ))
+                    service_path.rename(trash_dir / service_name)
+                    # stderr is captured so errors land in this service's output
+                    # rather than over the progress display
+                    remover = subprocess.Popen(
+                        ["rm", "-rf", str(trash_dir)],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.PIPE,
+                        text=True
+                    )
+            except Exception as e:
+                out.print(f"[red]Error removing {service_name}: {e}[/red]")
+                return out.file.getvalue()
+        else:
+            out.print(f"[yellow]Service {service_name} already exists, skipping.[/yellow]")
+            return out.file.getvalue()
+
+    try:
+        # Build git clone command with branch if specified. By default only the
+        # tip of the branch is fetched; the build never needs older history.
+        clone_cmd = ["git", "clone"]
+        if depth:
+            clone_cmd.extend(["--depth", str(depth), "--single-branch"])
+        if branch:
+            clone_cmd.extend(["-b", branch])
+        clone_cmd.extend([repo_url, str(service_path)])
+
+        # Only stderr is kept, for the error message on failure
+        subprocess.run(
+            clone_cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=True,
+            env=_GIT_ENV
+        )
+
+        success_msg = f"[green]✓[/green] Cloned {service_name}"
+        if branch:
+            success_msg += f" [dim]({branch})[/dim]"
+        out.print(success_msg)
+
+    except subprocess.CalledProcessError as e:
+        out.print(
+            f"[red]✗ Failed to clone {service_name}[/red]\n"
+            f"[dim]{e.stderr}[/dim]"
+        )
+    except Exception as e:
+        out.print(f"[red]✗ Error cloning {service_name}: {e}[/red]")
+    finally:
+        if remover is not None:
+            _, remove_errors = remover.communicate()
+            if remover.returncode != 0:
+                out.print(
+                    f"[yellow]Warning: could not fully remove the old {service_name} "
+                    f"checkout[/yellow]\n"
+                    f"[dim]{remove_errors}[/dim]"
+                )
+
+    return out.file.getvalue()
+
 
 def clone_services(
-    service_repos: Dict[str, Dict],
+    service_repos: Dict[str, Dict[str, Any]],
     services_dir: Path,
-    force: bool = False
+    force: bool = False,
+    jobs: Optional[int] = None,
+    full_history: bool = False
 ) -> None:
     """Clone service repositories into the services directory.
 
+    Repositories are cloned concurrently; each clone's output is buffered and
+    printed in configuration order once all clones have finished.
+
     Args:
-        service_repos: Dictionary mapping service names to repository config (url, branch).
+        service_repos: Dictionary mapping service names to repository config (url, branch),
+            as returned by Config.get_service_repos. Plain URL strings are also accepted.
         services_dir: Directory to clone services into.
         force: If True, remove existing service directories before cloning.
+        jobs: Maximum number of concurrent clones. Defaults to min(8, number of services).
+        full_history: If True, clone all history. Otherwise make shallow, single-branch clones.
     """
     if not service_repos:
         console.print(
@@ -29,87 +180,70 @@ def clone_services(
         )
         return
 
+    from concurrent.futures import ThreadPoolExecutor
+
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+
+    # Normalize once so the clone loop only deals with dicts
+    service_repos = {
+        name: {'url': repo_config} if isinstance(repo_config, str) else repo_config
+        for name, repo_config in service_repos.items()
+    }
+
     services_dir.mkdir(parents=True, exist_ok=True)
 
+    max_workers = jobs if jobs and jobs > 0 else min(8, len(service_repos))
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         console=console,
+        transient=True,
     ) as progress:
-
-        for service_name, repo_config in service_repos.items():
-            service_path = services_dir / service_name
-
-            # Extract URL and branch
-            repo_url = repo_config.get('url', repo_config) if isinstance(repo_config, dict) else repo_config
-            branch = repo_config.get('branch') if isinstance(repo_config, dict) else None
-
-            # Check if service already exists
-            if service_path.exists():
-                if force:
-                    task = progress.add_task(
-                        f"Removing existing {service_name}...",
-                        total=None
-                    )
-                    try:
-                        import shutil
-                        shutil.rmtree(service_path)
-                        progress.update(task, completed=True)
-                    except Exception as e:
-                        console.print(
-                            f"[red]Error removing {service_name}: {e}[/red]"
-                        )
-                        continue
-                else:
-                    console.print(
-                        f"[yellow]Service {service_name} already exists, skipping.[/yellow]"
-                    )
-                    continue
-
-            # Clone the repository
-            clone_msg = f"Cloning {service_name}"
-            if branch:
-                clone_msg += f" ({branch})"
-            task = progress.add_task(f"{clone_msg}...", total=None)
-
-            try:
-                # Build git clone command with branch if specified
-                clone_cmd = ["git", "clone"]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for service_name, repo_config in service_repos.items():
+                branch = repo_config.get('branch')
+                clone_msg = f"Cloning {service_name}"
                 if branch:
-                    clone_cmd.extend(["-b", branch])
-                clone_cmd.extend([repo_url, str(service_path)])
-
-                result = subprocess.run(
-                    clone_cmd,
-                    capture_output=True,
-                    text=True,
-                    check=True
+                    clone_msg += f" ({branch})"
+                task = progress.add_task(f"{clone_msg}...", total=None)
+
+                future = executor.submit(
+                    _clone_service,
+                    service_name,
+                    repo_config,
+                    services_dir / service_name,
+                    force,
+                    full_history
                 )
-                progress.update(task, completed=True)
+                # Drop the spinner as soon as this clone finishes (Progress is thread-safe)
+                future.add_done_callback(lambda _, task=task: progress.remove_task(task))
+                futures.append(future)
 
-                success_msg = f"[green]✓[/green] Cloned {service_name}"
-                if branch:
-                    success_msg += f" [dim]({branch})[/dim]"
-                console.print(success_msg)
+            outputs = [future.result() for future in futures]
 
-            except subprocess.CalledProcessError as e:
-                console.print(
-                    f"[red]✗ Failed to clone {service_name}[/red]\n"
-                    f"[dim]{e.stderr}[/dim]"
-                )
-            except Exception as e:
-                console.print(f"[red]✗ Error cloning {service_name}: {e}[/red]")
+    # Service directories were created or removed
+    path_exists.cache_clear()
 
+    # Flush buffered output in submission order for deterministic logs
+    for output in outputs:
+        console.file.write(output)
+    console.file.flush()
 
-def check_docker_compose_installed() -> bool:
-    """Check if docker-compose is installed and available.
+
+def _run_check(command: List[str]) -> bool:
+    """Run a tool probe command and report whether it succeeded.
+
+    Args:
+        command: Command to run.
 
     Returns:
-        True if docker-compose is available, False otherwise.
+        True if the command ran and exited successfully, False otherwise.
     """
     try:
-        result = subprocess.run(
-            ["docker", "compose", "version"],
+        subprocess.run(
+            command,
             capture_output=True,
             text=True,
             check=True
@@ -119,27 +253,40 @@ def check_docker_compose_installed() -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=1)
+def check_docker_compose_installed() -> bool:
+    """Check if docker-compose is installed and available.
+
+    Docker compose v2 is a docker plugin, so when the docker binary is on PATH
+    'docker compose version' is run to make sure the plugin is installed too.
+    The result is cached for the lifetime of the process.
+
+    Returns:
+        True if docker-compose is available, False otherwise.
+    """
+    return shutil.which("docker") is not None and _run_check(["docker", "compose", "version"])
+
+
+@functools.lru_cache(maxsize=1)
 def check_git_installed() -> bool:
     """Check if git is installed and available.
 
+    Only checks that the git binary is on PATH. The result is cached for the
+    lifetime of the process.
+
     Returns:
         True if git is available, False otherwise.
     """
-    try:
-        result = subprocess.run(
-            ["git", "--version"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+    return shutil.which("git") is not None
 
 
+@functools.lru_cache(maxsize=1)
 def validate_environment() -> bool:
     """Validate that required tools are installed.
 
+    The result is cached for the lifetime of the process, so the tool checks
+    run (and any warnings are printed) at most once.
+
     Returns:
         True if environment is valid, False otherwise.
     """
@@ -163,21 +310,87 @@ def validate_environment() -> bool:
 def format_service_status(service_info: dict) -> Dict[str, str]:
     """Format service status information for display.
 
+    Results are cached on the displayed fields, so containers whose state has
+    not changed are not re-formatted when status is polled repeatedly.
+
     Args:
         service_info: Service information from docker-compose ps.
 
+    Returns:
+        Formatted service information dictionary. It is shared between calls and
+        must not be mutated.
+    """
+    return _format_service_status(
+        service_info.get("Name", "N/A"),
+        service_info.get("Service", "N/A"),
+        service_info.get("State", "N/A"),
+        service_info.get("Status", "N/A"),
+        _port_pairs(service_info.get("Publishers", [])),
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_service_status(
+    name: str,
+    service: str,
+    state: str,
+    status: str,
+    ports: Tuple[Tuple[Any, Any], ...]
+) -> Dict[str, str]:
+    """Build the formatted status dictionary for format_service_status.
+
+    Args:
+        name: Container name.
+        service: Compose service name.
+        state: Container state.
+        status: Human-readable container status.
+        ports: (published, target) port pairs from _port_pairs.
+
     Returns:
         Formatted service information dictionary.
     """
     return {
-        "Name": service_info.get("Name", "N/A"),
-        "Service": service_info.get("Service", "N/A"),
-        "State": service_info.get("State", "N/A"),
-        "Status": service_info.get("Status", "N/A"),
-        "Ports": format_ports(service_info.get("Publishers", [])),
+        "Name": name,
+        "Service": service,
+        "State": state,
+        "Status": status,
+        "Ports": _format_port_pairs(ports),
     }
 
 
+def _port_pairs(publishers: list) -> Tuple[Tuple[Any, Any], ...]:
+    """Reduce port publisher dictionaries to hashable (published, target) pairs.
+
+    Args:
+        publishers: List of port publisher dictionaries.
+
+    Returns:
+        Tuple of (published port, target port) pairs.
+    """
+    return tuple(
+        (pub.get("PublishedPort", ""), pub.get("TargetPort", ""))
+        for pub in publishers or ()
+    )
+
+
+def _format_port_pairs(ports: Tuple[Tuple[Any, Any], ...]) -> str:
+    """Format (published, target) port pairs for display.
+
+    Args:
+        ports: (published, target) port pairs.
+
+    Returns:
+        Formatted port string.
+    """
+    port_strs = [
+        f"{published_port}→{target_port}"
+        for published_port, target_port in ports
+        if published_port and target_port
+    ]
+
+    return ", ".join(port_strs) if port_strs else "N/A"
+
+
 def format_ports(publishers: list) -> str:
     """Format port mappings for display.
 
@@ -187,38 +400,143 @@ def format_ports(publishers: list) -> str:
     Returns:
         Formatted port string.
     """
-    if not publishers:
-        return "N/A"
+    return _format_port_pairs(_port_pairs(publishers))
 
-    port_strs = []
-    for pub in publishers:
-        published_port = pub.get("PublishedPort", "")
-        target_port = pub.get("TargetPort", "")
-        if published_port and target_port:
-            port_strs.append(f"{published_port}→{target_port}")
 
-    return ", ".join(port_strs) if port_strs else "N/A"
+def compute_build_stamp(
+    service_path: Path,
+    build_config: BuildConfig,
+    docker: bool = False
+) -> Optional[str]:
+    """Compute a fingerprint of a service's build inputs.
+
+    The fingerprint covers the build configuration, the checked-out commit and
+    any uncommitted changes (including their modification times), so it changes
+    whenever a rebuild could produce different output. Ignored files such as
+    build artifacts are not part of it.
+
+    Args:
+        service_path: Path to the service directory.
+        build_config: Build configuration.
+        docker: Whether the Docker image is built as well.
+
+    Returns:
+        Hex digest, or None if the service is not a git checkout.
+    """
+    # Output is kept as bytes: paths are not necessarily valid UTF-8
+    try:
+        head, toplevel = subprocess.run(
+            ["git", "rev-parse", "HEAD", "--show-toplevel"],
+            cwd=service_path,
+            capture_output=True,
+            check=True
+        ).stdout.splitlines()
+        changes = subprocess.run(
+            ["git", "status", "--porcelain", "-z", "--untracked-files=all"],
+            cwd=service_path,
+            capture_output=True,
+            check=True
+        ).stdout
+    except (subprocess.CalledProcessError, FileNotFoundError, NotADirectoryError):
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (repr(build_config).encode(), str(docker).encode(), head, changes):
+        digest.update(part)
+        digest.update(b"\0")
+
+    # With -z, entries are NUL-terminated "XY path" with unquoted paths relative
+    # to the repository root (which may be above service_path); renames and
+    # copies are followed by an extra entry holding the original path
+    repo_root = Path(os.fsdecode(toplevel))
+    entries = iter(changes.split(b"\0"))
+    for entry in entries:
+        if not entry:
+            continue
+        if b"R" in entry[:2] or b"C" in entry[:2]:
+            next(entries, None)
+        changed_path = repo_root / os.fsdecode(entry[3:])
+        try:
+            digest.update(str(changed_path.stat().st_mtime_ns).encode())
+        except OSError:
+            pass
+
+    return digest.hexdigest()
+
+
+def _run_build_command(
+    command: Union[str, List[str]],
+    cwd: Path,
+    out: Console,
+    capture: bool
+) -> None:
+    """Run a build command, optionally capturing its output.
+
+    Args:
+        command: Shell command string, run through the system shell, or an argv list
+            run directly.
+        cwd: Working directory for the command.
+        out: Console that receives captured output.
+        capture: If True, capture combined stdout/stderr and write it to out's file as-is.
+            Standard input is closed, so a command that prompts fails instead of hanging.
+
+    Raises:
+        subprocess.CalledProcessError: If the command exits with a non-zero code.
+    """
+    shell = isinstance(command, str)
+
+    if not capture:
+        subprocess.run(command, shell=shell, cwd=cwd, check=True)
+        return
+
+    # Nobody can answer a prompt from a captured (parallel) build
+    try:
+        result = subprocess.run(
+            command,
+            shell=shell,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        if e.output:
+            out.file.write(e.output)
+        raise
+
+    # Written verbatim so long lines, carriage returns and escapes are not
+    # rewrapped or stripped by Rich
+    if result.stdout:
+        out.file.write(result.stdout)
 
 
 def build_service(
     service_name: str,
     service_path: Path,
-    build_config: dict,
-    docker: bool = False
+    build_config: BuildConfig,
+    docker: bool = False,
+    output: Optional[Console] = None
 ) -> bool:
     """Build a service using its build configuration.
 
     Args:
         service_name: Name of the service.
         service_path: Path to the service directory.
-        build_config: Build configuration dictionary.
+        build_config: Build configuration.
         docker: If True, run docker build command; otherwise run main build command.
+        output: Console to write to. When given, command output is captured and
+            written to it instead of streaming to the terminal.
 
     Returns:
         True if build succeeded, False otherwise.
     """
-    if not service_path.exists():
-        console.print(
+    out = output or console
+    capture = output is not None
+
+    if not path_exists(service_path):
+        out.print(
             f"[red]Error: Service directory {service_path} does not exist[/red]\n"
             f"[dim]Run 'shardctl setup' to clone service repositories[/dim]"
         )
@@ -226,24 +544,24 @@ def build_service(
 
     # Determine which command to run
     if docker:
-        build_command = build_config.get("docker_build_command")
+        build_command = build_config.docker_build_command
         if not build_command:
-            console.print(
+            out.print(
                 f"[yellow]No docker build command configured for {service_name}[/yellow]"
             )
             return False
-        console.print(f"[bold blue]Building Docker image for {service_name}...[/bold blue]")
+        out.print(f"[bold blue]Building Docker image for {service_name}...[/bold blue]")
     else:
-        build_command = build_config.get("build_command")
+        build_command = build_config.build_command
         if not build_command:
-            console.print(
+            out.print(
                 f"[red]No build command configured for {service_name}[/red]"
             )
             return False
-        console.print(f"[bold blue]Building {service_name}...[/bold blue]")
+        out.print(f"[bold blue]Building {service_name}...[/bold blue]")
 
-    # Check if we need to wrap commands with nix develop
-    environment = build_config.get("environment")
+    # Check if we need to run commands inside nix develop
+    environment = build_config.environment
     use_nix = False
 
     if environment == "nix":
@@ -251,82 +569,72 @@ def build_service(
         try:
             subprocess.run(
                 ["nix", "--version"],
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 check=True
             )
             use_nix = True
-            console.print("[dim]Running in Nix development environment[/dim]")
+            out.print("[dim]Running in Nix development environment[/dim]")
         except (subprocess.CalledProcessError, FileNotFoundError):
-            console.print(
+            out.print(
                 "[yellow]Warning: Nix not found, trying build without Nix environment[/yellow]"
             )
 
+    # Inside nix, commands are handed to bash as a single argument so no quoting
+    # is needed; otherwise they run through the system shell
+    nix_prefix = ["nix", "develop", "--command", "bash", "-c"] if use_nix else None
+
     # Run pre-build steps
     if docker:
         # Docker build uses docker_pre_build_steps
-        pre_build_steps = build_config.get("docker_pre_build_steps", [])
+        pre_build_steps = build_config.docker_pre_build_steps
     else:
         # Regular build uses pre_build_steps
-        pre_build_steps = build_config.get("pre_build_steps", [])
+        pre_build_steps = build_config.pre_build_steps
 
     if pre_build_steps:
-        console.print("[dim]Running pre-build steps...[/dim]")
+        out.print("[dim]Running pre-build steps...[/dim]")
         for step in pre_build_steps:
-            # Wrap pre-build step in nix if needed
-            if use_nix:
-                step_cmd = f'nix develop --command bash -c "{step}"'
-            else:
-                step_cmd = step
-
-            console.print(f"[dim]$ {step}[/dim]")
+            out.print(f"[dim]$ {step}[/dim]")
             try:
-                result = subprocess.run(
-                    step_cmd,
-                    shell=True,
-                    cwd=service_path,
-                    check=True
-                )
-            except subprocess.CalledProcessError as e:
-                console.print(f"[red]Pre-build step failed: {step}[/red]")
+                command = nix_prefix + [step] if nix_prefix else step
+                _run_build_command(command, service_path, out, capture)
+            except subprocess.CalledProcessError:
+                out.print(f"[red]Pre-build step failed: {step}[/red]")
+                return False
+            except OSError as e:
+                out.print(f"[red]Pre-build step failed: {step} ({e})[/red]")
                 return False
-
-    # Wrap main build command in nix if needed
-    if use_nix:
-        build_command = f'nix develop --command bash -c "{build_command}"'
 
     # Run the build command
-    console.print(f"[dim]$ {build_command}[/dim]")
+    out.print(f"[dim]$ {build_command}[/dim]")
 
     try:
-        result = subprocess.run(
-            build_command,
-            shell=True,
-            cwd=service_path,
-            check=True
-        )
+        command = nix_prefix + [build_command] if nix_prefix else build_command
+        _run_build_command(command, service_path, out, capture)
 
         if docker:
-            docker_image = build_config.get("docker_image", "N/A")
-            console.print(
+            docker_image = build_config.docker_image or "N/A"
+            out.print(
                 f"[green]✓[/green] Docker image built successfully: {docker_image}"
             )
         else:
-            console.print(f"[green]✓[/green] Build completed successfully")
+            out.print(f"[green]✓[/green] Build completed successfully")
 
             # Show binary path if available
-            binary_path = build_config.get("binary_path")
+            binary_path = build_config.binary_path
             if binary_path:
                 full_binary_path = service_path / binary_path
                 if full_binary_path.exists():
-                    console.print(f"[dim]Binary: {full_binary_path}[/dim]")
+                    out.print(f"[dim]Binary: {full_binary_path}[/dim]")
 
         return True
 
     except subprocess.CalledProcessError as e:
-        console.print(f"[red]✗ Build failed with exit code {e.returncode}[/red]")
+        out.print(f"[red]✗ Build failed with exit code {e.returncode}[/red]")
         return False
     except Exception as e:
-        console.print(f"[red]✗ Build error: {e}[/red]")
+        out.print(f"[red]✗ Build error: {e}[/red]")
         return False
 
 
@@ -346,8 +654,7 @@ repositories:
 """
 
     try:
-        with open(config_path, 'w') as f:
-            f.write(example_content)
+        Path(config_path).write_bytes(example_content.encode('utf-8'))
         console.print(f"[green]Created example configuration at {config_path}[/green]")
     except Exception as e:
         console.print(f"[red]Error creating configuration file: {e}[/red]")